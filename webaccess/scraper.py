@@ -1,15 +1,191 @@
-from typing import Optional, Dict, Union
-from functools import lru_cache
+from typing import Optional, Dict, Union, Callable, List, Iterable, Awaitable, TypeVar
+from functools import lru_cache, partial, wraps
+from collections import OrderedDict
+from hashlib import blake2b
+import threading
+import atexit
+import asyncio
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from ipaddress import ip_address
 from browserforge.headers import Browser, HeaderGenerator
 import httpx
+import httpcore
+from cachetools import TTLCache
 from httpx._models import Response as BaseResponse
 from tldextract import extract
-from markitdown import MarkItDown
-import tempfile
+from lxml import etree
+from lxml.html import HTMLParser, document_fromstring
 import os
-from io import StringIO
-from markdown import Markdown
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from io import BytesIO
 import re
+from importlib.util import find_spec
+
+try:
+    import diskcache
+except ImportError:  # The on-disk response cache is optional
+    diskcache = None
+
+try:
+    import aiodns
+except ImportError:  # Falls back to the event loop's getaddrinfo
+    aiodns = None
+
+# HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`).
+_HTTP2 = find_spec('h2') is not None
+# Only advertise encodings httpx can decode, it decompresses them so `response.content` stays plain bytes.
+_ACCEPT_ENCODING = ', '.join(
+    ['gzip', 'deflate']
+    + (['br'] if find_spec('brotli') or find_spec('brotlicffi') else [])
+    + (['zstd'] if find_spec('zstandard') else []))
+
+# Resolved addresses keyed on (host, port), httpx/httpcore call getaddrinfo for every new connection otherwise.
+_DNS_CACHE = TTLCache(maxsize=2048, ttl=300)
+_dns_lock = threading.Lock()  # TTLCache isn't thread-safe
+
+def _is_ip(host: str) -> bool:
+    try:
+        ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+def _get_cached(host: str, port: int) -> Optional[List[str]]:
+    with _dns_lock:
+        return _DNS_CACHE.get((host, port))
+
+def _set_cached(host: str, port: int, addresses: List[str]) -> List[str]:
+    if addresses:
+        with _dns_lock:
+            _DNS_CACHE[(host, port)] = addresses
+    return addresses
+
+def _forget_cached(host: str, port: int) -> None:
+    """Drop a host's addresses, e.g. all of them failed, so the next connection resolves it again."""
+    with _dns_lock:
+        _DNS_CACHE.pop((host, port), None)
+
+def _unique_addresses(infos: Iterable) -> List[str]:
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+def _unique_node_addresses(nodes: Iterable) -> List[str]:
+    # pycares gives the address as bytes
+    return list(dict.fromkeys(node.addr[0].decode() if isinstance(node.addr[0], bytes) else node.addr[0] for node in nodes))
+
+def resolve_host(host: str, port: int) -> List[str]:
+    """Resolve `host` to its IP addresses through the cache."""
+    addresses = _get_cached(host, port)
+    if addresses is None:
+        addresses = _set_cached(host, port, _unique_addresses(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)))
+    return addresses
+
+# c-ares channels are bound to a loop, so one resolver is kept per event loop rather than created for every lookup.
+# The resolver references its loop, so entries are dropped once their loop is closed instead of through weak keys.
+_ARESOLVERS: Dict[asyncio.AbstractEventLoop, Optional['aiodns.DNSResolver']] = {}
+_aresolvers_lock = threading.Lock()
+
+def _aresolver() -> Optional['aiodns.DNSResolver']:
+    """The running loop's c-ares resolver, `None` if `aiodns` isn't installed or can't run on this loop."""
+    if aiodns is None:
+        return None
+    loop = asyncio.get_running_loop()
+    with _aresolvers_lock:
+        if loop not in _ARESOLVERS:
+            for closed in [l for l in _ARESOLVERS if l.is_closed()]:
+                del _ARESOLVERS[closed]
+            try:
+                _ARESOLVERS[loop] = aiodns.DNSResolver(loop=loop)
+            except RuntimeError:  # e.g. the Proactor loop on Windows
+                _ARESOLVERS[loop] = None
+        return _ARESOLVERS[loop]
+
+async def aresolve_host(host: str, port: int) -> List[str]:
+    """Async version of `resolve_host`, uses `aiodns` if it's installed."""
+    addresses = _get_cached(host, port)
+    if addresses is not None:
+        return addresses
+
+    resolver = _aresolver()
+    if resolver is not None:
+        # getaddrinfo rather than gethostbyname, whose hostent only holds one address family
+        try:
+            result = await resolver.getaddrinfo(host, port=port, type=socket.SOCK_STREAM)
+            return _set_cached(host, port, _unique_node_addresses(result.nodes))
+        except aiodns.error.DNSError:
+            pass  # c-ares only knows DNS and the hosts file, let the system resolver (nsswitch, mDNS...) try
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return _set_cached(host, port, _unique_addresses(infos))
+
+class CachedDNSBackend(httpcore.NetworkBackend):
+    """httpcore network backend that connects to cached addresses, TLS still uses the hostname for SNI."""
+    def __init__(self, backend: httpcore.NetworkBackend) -> None:
+        self._backend = backend
+
+    def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None, socket_options=None) -> httpcore.NetworkStream:
+        if _is_ip(host):
+            return self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        error = None
+        for address in resolve_host(host, port):
+            try:
+                return self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e  # try the next address
+        _forget_cached(host, port)  # The host may have moved, resolve it again next time
+        raise error or httpcore.ConnectError(f'No address found for {host}')
+
+    def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None) -> httpcore.NetworkStream:
+        return self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    def sleep(self, seconds: float) -> None:
+        self._backend.sleep(seconds)
+
+class AsyncCachedDNSBackend(httpcore.AsyncNetworkBackend):
+    """Async version of `CachedDNSBackend`."""
+    def __init__(self, backend: httpcore.AsyncNetworkBackend) -> None:
+        self._backend = backend
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None, local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        if _is_ip(host):
+            return await self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        error = None
+        for address in await aresolve_host(host, port):
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e  # try the next address
+        _forget_cached(host, port)  # The host may have moved, resolve it again next time
+        raise error or httpcore.ConnectError(f'No address found for {host}')
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+def with_dns_cache(transport: Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport]) -> Union[httpx.HTTPTransport, httpx.AsyncHTTPTransport]:
+    """Route the connections of an httpx transport through the DNS cache.
+
+    httpx doesn't expose its connection pool's network backend, the transport is returned unchanged if that changes.
+    """
+    pool = getattr(transport, '_pool', None)
+    backend = getattr(pool, '_network_backend', None)
+    if isinstance(backend, httpcore.AsyncNetworkBackend):
+        pool._network_backend = AsyncCachedDNSBackend(backend)
+    elif isinstance(backend, httpcore.NetworkBackend):
+        pool._network_backend = CachedDNSBackend(backend)
+    return transport
+
+def prewarm(hosts: Iterable[str], port: int = 443) -> None:
+    """Resolve `hosts` into the cache from a background thread so the first requests to them skip the lookup."""
+    def _job() -> None:
+        for host in hosts:
+            try:
+                resolve_host(host, port)
+            except OSError:
+                pass
+    threading.Thread(target=_job, name='webaccess-dns-prewarm', daemon=True).start()
 
 class Response:
     def __init__(self, response: httpx.Response, convert_to_markdown, convert_to_plain_text):
@@ -38,14 +214,52 @@ class Response:
             self._plain_text = self._convert_to_plain_text(self._response.content)
         return self._plain_text
 
-def generate_headers() -> Dict[str, str]:
-    """Generate real browser-like headers using browserforge's generator."""
+def install_event_loop() -> None:
+    """Use a faster event loop for the async fetching if one is installed, otherwise keep asyncio's default.
+
+    `uringcore` (io_uring based, needs Linux kernel 5.11+) is preferred, then `uvloop`.
+    Opt-in as it changes the process-wide event loop policy: call it once at startup (the `__main__` blocks do), before
+    `asyncio.run()` so the `httpx.AsyncClient` created inside it binds to the new loop.
+    """
+    try:
+        import uringcore
+        asyncio.set_event_loop_policy(uringcore.EventLoopPolicy())
+    except ImportError:
+        try:
+            import uvloop
+            uvloop.install()
+        except ImportError:
+            pass
+
+T = TypeVar('T')
+
+def run_sync(make_coro: Callable[[], Awaitable[T]]) -> T:
+    """Run the coroutine made by `make_coro` to completion from sync code.
+
+    Uses `asyncio.run()` normally. When called from inside a running event loop (FastAPI, Jupyter, async agents...)
+    `asyncio.run()` isn't allowed, so it runs on a fresh loop in a worker thread, blocking the caller like a plain sync
+    call; async callers should prefer the `a*` method directly.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(make_coro())
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(lambda: asyncio.run(make_coro())).result()
+
+@lru_cache(None)
+def _header_generator() -> HeaderGenerator:
+    """Build browserforge's generator once, it loads its browser-profile tables on construction."""
     browsers = [
         Browser(name='chrome', min_version=120),
         Browser(name='firefox', min_version=120),
         Browser(name='edge', min_version=120),
     ]
-    return HeaderGenerator(browser=browsers, device='desktop').generate()
+    return HeaderGenerator(browser=browsers, device='desktop')
+
+def generate_headers() -> Dict[str, str]:
+    """Generate real browser-like headers using browserforge's generator."""
+    return _header_generator().generate()
 
 @lru_cache(None, typed=True)
 def generate_convincing_referer(url: str) -> str:
@@ -63,47 +277,165 @@ def headers_job( headers: Optional[Dict], url: str) -> Dict:
     headers = headers or {}
 
     # Validate headers
-    headers['User-Agent'] = generate_headers().get('User-Agent')
-    extra_headers = generate_headers()
-    headers.update(extra_headers)
+    headers.update(generate_headers())  # User-Agent included
+    for key in [key for key in headers if key.lower() == 'accept-encoding']:
+        del headers[key]
+    headers['Accept-Encoding'] = _ACCEPT_ENCODING
     headers.update({'referer': generate_convincing_referer(url)})
 
     return headers
 
-def convert_to_markdown(content: bytes) -> str:
+def _sniff_ext(content: bytes) -> Optional[str]:
+    """Guess the file extension from the content's magic bytes so MarkItDown picks the right converter."""
+    if content.startswith(b'%PDF'):
+        return '.pdf'
+    if content.startswith(b'PK\x03\x04'):
+        # Office files are zip archives, the central directory at the end names their main part.
+        for part, ext in ((b'word/', '.docx'), (b'xl/', '.xlsx'), (b'ppt/', '.pptx')):
+            if part in content:
+                return ext
+        return '.zip'
+    head = content[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if head.startswith(b'<!doctype html') or b'<html' in head:
+        return '.html'
+    if head.startswith((b'{', b'[')):
+        return '.json'
+    return None
+
+_CONVERSION_CACHE_SIZE = int(os.environ.get('WEBACCESS_MD_CACHE_SIZE', 256))
+_conversion_cache: 'OrderedDict[tuple, str]' = OrderedDict()
+_conversion_lock = threading.Lock()
+
+def _cached_conversion(func: Callable[..., str]) -> Callable[..., str]:
+    """LRU-memoize a content converter on a hash of the content, so the same page/PDF is only converted once.
+
+    The cache is shared by all converters and bounded by the `WEBACCESS_MD_CACHE_SIZE` env variable (default 256).
+    """
+    @wraps(func)
+    def wrapper(content: bytes, *args) -> str:
+        key = (func.__name__, blake2b(content, digest_size=16).digest(), *args)
+        with _conversion_lock:
+            if key in _conversion_cache:
+                _conversion_cache.move_to_end(key)
+                return _conversion_cache[key]
+
+        result = func(content, *args)
+        with _conversion_lock:
+            _conversion_cache[key] = result
+            while len(_conversion_cache) > _CONVERSION_CACHE_SIZE:
+                _conversion_cache.popitem(last=False)
+        return result
+    return wrapper
+
+# MarkItDown and python-markdown pull in large dependency trees (pdfminer, ...), they are only imported on the first
+# conversion so search-only users don't pay for them.
+@lru_cache(None)
+def _markitdown():
+    """Create the MarkItDown converter once and reuse it, it registers all its converters on construction."""
+    from markitdown import MarkItDown
+    return MarkItDown()
+
+# Bytes of HTML kept per wanted character of output when truncating, safe for roman scripts.
+_HTML_BYTES_PER_CHAR = 8
+
+def _convert_prefix(convert: Callable[..., str], content: bytes, max_bytes: Optional[int], *args) -> str:
+    """Run `convert` on only the start of an HTML document when that is enough to produce `max_bytes` characters."""
+    if max_bytes and max_bytes > 0 and len(content) > max_bytes * _HTML_BYTES_PER_CHAR and _sniff_ext(content) == '.html':
+        text = convert(content[:max_bytes * _HTML_BYTES_PER_CHAR], *args)
+        if len(text) >= max_bytes:
+            return text
+    return convert(content, *args)  # Not HTML, small enough, or the prefix was mostly markup
+
+@_cached_conversion
+def _convert_to_markdown(content: bytes, encoding: Optional[str] = None) -> str:
+    md = _markitdown()
+    from markitdown import StreamInfo
+    # MarkItDown reads HTML as UTF-8 unless told the charset, which may only be in the HTTP header
+    return md.convert_stream(BytesIO(content), stream_info=StreamInfo(extension=_sniff_ext(content), charset=encoding)).text_content
+
+def convert_to_markdown(content: bytes, max_bytes: Optional[int] = None, encoding: Optional[str] = None) -> str:
     """Converts HTML, PDF or Many other file content to Markdown using MarkItDown.
 
     Args:
         content: PDF, HTML, or other file content to convert to Markdown.
+        max_bytes: Only the output's first `max_bytes` characters are needed, lets long HTML pages be converted from a
+            prefix. Truncation is best-effort: the result can be (much) longer and may end mid-token.
+        encoding: The charset from the response's `Content-Type` header, if any.
 
     Returns:
         The Markdown representation of the content.
     """
-    md = MarkItDown()
-    temp_path = None
+    return _convert_prefix(_convert_to_markdown, content, max_bytes, encoding)
+
+# Elements that start a new line in rendered HTML, their tails get a newline so blocks don't run into each other.
+_BLOCK_TAGS = ('address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'footer', 'form',
+               'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section',
+               'table', 'td', 'th', 'title', 'tr', 'ul')
+_NL_RE = re.compile(r'\n+')
+_HSPACE_RE = re.compile(r'[^\S\n]+')
+_LINES_RE = re.compile(r'\s*\n\s*')
+
+def _utf8_or_none(content: bytes) -> Optional[str]:
+    """`'utf-8'` if the bytes are valid UTF-8, else `None`."""
     try:
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_file.write(content)
-            tmp_file.flush()  # Ensure data is written to file
-            temp_path = tmp_file.name
-        markdown_result = md.convert_local(temp_path).text_content
-        return markdown_result
-    except Exception as e:
-        raise e
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            os.remove(temp_path)
-
-def convert_to_plain_text(content: bytes) -> str:
-    """Converts Markdown content to a clean text.
+        content.decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        # A prefix cut by `_convert_prefix` can split the last character
+        if e.reason == 'unexpected end of data' and e.start >= len(content) - 3:
+            return 'utf-8'
+    return None
+
+def _html_parser(content: bytes, encoding: Optional[str]) -> HTMLParser:
+    """HTML parser decoding with the HTTP header's charset, else UTF-8 if the bytes are valid UTF-8.
+
+    Without an encoding lxml only goes by the page's `<meta charset>` (latin-1 without one), so UTF-8 pages that
+    declare their charset in the HTTP header alone would come out as mojibake.
+    """
+    for candidate in (encoding, _utf8_or_none(content)):
+        if candidate:
+            try:
+                return HTMLParser(remove_comments=True, remove_pis=True, encoding=candidate)
+            except LookupError:  # Charset libxml2 doesn't know
+                pass
+    return HTMLParser(remove_comments=True, remove_pis=True)
+
+def _html_to_plain_text(content: bytes, encoding: Optional[str] = None) -> str:
+    """Extract the text of an HTML document in one lxml pass, keeping one line per block element."""
+    tree = document_fromstring(content, parser=_html_parser(content, encoding))
+    etree.strip_elements(tree, 'script', 'style', 'noscript', 'template', with_tail=False)
+    for element in tree.iter(*_BLOCK_TAGS):
+        element.tail = '\n' + element.tail if element.tail else '\n'
+    text = _HSPACE_RE.sub(' ', tree.text_content())
+    return _LINES_RE.sub('\n', text).strip()
+
+def convert_to_plain_text(content: bytes, max_bytes: Optional[int] = None, encoding: Optional[str] = None) -> str:
+    """Converts content to a clean text.
+
+    HTML is extracted directly with lxml, other formats (PDF, docx...) go through Markdown first.
 
     Args:
         content: PDF, HTML, or other file content to convert to plain text.
+        max_bytes: Same as in `convert_to_markdown`.
+        encoding: The charset from the response's `Content-Type` header, if any.
 
     Returns:
         The clean text representation of the content.
     """
-    md_content = convert_to_markdown(content)
+    return _convert_prefix(_convert_to_plain_text, content, max_bytes, encoding)
+
+@_cached_conversion
+def _convert_to_plain_text(content: bytes, encoding: Optional[str] = None) -> str:
+    if _sniff_ext(content) == '.html':
+        try:
+            return _html_to_plain_text(content, encoding)
+        except etree.ParserError:
+            pass  # Let MarkItDown have a go at it
+
+    from io import StringIO
+    from markdown import Markdown
+
+    md_content = _convert_to_markdown(content, encoding)
 
     def unmark_element(element, stream=None):
         if stream is None:
@@ -123,41 +455,214 @@ def convert_to_plain_text(content: bytes) -> str:
 
     final_text = __md.convert(md_content)
 
-    final_text = re.sub(r"\n+", "\n", final_text)
+    final_text = _NL_RE.sub("\n", final_text)
 
     return final_text
 
-@lru_cache(typed=True)
+# How long (seconds) fetched pages are served from the on-disk cache, `0` disables it.
+_HTTP_TTL = float(os.environ.get('WEBACCESS_HTTP_TTL', 600))
+# Headers describing the wire format, the cached body is already decoded.
+_WIRE_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding')
+
+@lru_cache(None)
+def _http_cache():
+    """On-disk response cache shared between runs and processes, `None` if disabled or `diskcache` isn't installed."""
+    if diskcache is None or _HTTP_TTL <= 0:
+        return None
+    return diskcache.Cache(os.path.expanduser('~/.cache/webaccess/http'))
+
+def _http_cache_key(url: str, cookies: Optional[Dict], headers: Dict, kwargs: Dict, use_cache: bool) -> Optional[str]:
+    """Cache key of a GET request, `None` if it must not be cached.
+
+    Requests with cookies are never cached: the cookie values would be written to disk in plain text, next to bodies
+    that may only be visible when logged in. Custom headers and other `kwargs` aren't part of the key.
+    """
+    if not use_cache or cookies or headers or kwargs:
+        return None
+    return url
+
+def _get_cached_response(url: str, key: str) -> Optional[httpx.Response]:
+    cache = _http_cache()
+    entry = cache.get(key) if cache is not None else None
+    if entry is None or time.time() - entry['ts'] >= _HTTP_TTL:
+        return None
+    # The request is rebuilt for the final URL so `response.url` (and links resolved against it) match a fresh fetch
+    return httpx.Response(entry['status'], content=entry['body'], headers=entry['headers'], request=httpx.Request('GET', entry.get('url', url)))
+
+def _set_cached_response(key: str, response: httpx.Response) -> None:
+    cache = _http_cache()
+    if cache is None or not response.is_success or 'no-store' in response.headers.get('cache-control', '').lower():
+        return
+    headers = [(name, value) for name, value in response.headers.items() if name.lower() not in _WIRE_HEADERS]
+    cache.set(key, {'status': response.status_code, 'url': str(response.url), 'headers': headers, 'body': response.content, 'ts': time.time()}, expire=_HTTP_TTL)
+
+class _NoStoreCookiePolicy(DefaultCookiePolicy):
+    """Refuse every `Set-Cookie`, so the long-lived shared clients don't link unrelated requests together."""
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+# httpx deprecates per-request `cookies=` on a client and drops the `Cookie` header on redirects, so each call keeps
+# its own jar (the caller's cookies plus any set along the redirect chain) and follows the redirects itself.
+def _send(client: httpx.Client, request: httpx.Request, cookies: Optional[Dict], follow_redirects: bool, auth=httpx.USE_CLIENT_DEFAULT) -> httpx.Response:
+    """Send `request` with a per-call cookie jar that is re-applied on every redirect hop."""
+    jar = httpx.Cookies(cookies)
+    history = []
+    while True:
+        jar.set_cookie_header(request)
+        response = client.send(request, auth=auth, follow_redirects=False)
+        jar.extract_cookies(response)
+        response.history = list(history)
+        if not follow_redirects or response.next_request is None:
+            return response
+        if len(history) >= client.max_redirects:
+            raise httpx.TooManyRedirects('Exceeded maximum allowed redirects.', request=request)
+        history.append(response)
+        request = response.next_request
+
+async def _asend(client: httpx.AsyncClient, request: httpx.Request, cookies: Optional[Dict], follow_redirects: bool, auth=httpx.USE_CLIENT_DEFAULT) -> httpx.Response:
+    """Async version of `_send`."""
+    jar = httpx.Cookies(cookies)
+    history = []
+    while True:
+        jar.set_cookie_header(request)
+        response = await client.send(request, auth=auth, follow_redirects=False)
+        jar.extract_cookies(response)
+        response.history = list(history)
+        if not follow_redirects or response.next_request is None:
+            return response
+        if len(history) >= client.max_redirects:
+            raise httpx.TooManyRedirects('Exceeded maximum allowed redirects.', request=request)
+        history.append(response)
+        request = response.next_request
+
+_SCRAPERS: 'OrderedDict[tuple, BasicScraper]' = OrderedDict()
+_SCRAPERS_SIZE = 32
+_scrapers_lock = threading.Lock()
+
+@atexit.register
+def _close_scrapers() -> None:
+    """Release the connection pools of all shared scrapers."""
+    with _scrapers_lock:
+        for scraper in _SCRAPERS.values():
+            scraper.close()
+        _SCRAPERS.clear()
+
 class BasicScraper:
     """Basic scraper class for making HTTP requests."""
+    @classmethod
+    def shared(cls, proxy: Optional[str] = None, follow_redirects: bool = True, timeout: Optional[Union[int, float]] = None, retries: Optional[int] = 3) -> 'BasicScraper':
+        """Get the scraper shared by all callers using the same settings, so they share its connection pool.
+
+        At most 32 are kept. When a new one doesn't fit, the least recently used one is only forgotten, not closed,
+        as callers may still hold it; `__del__` closes it once the last reference goes away.
+        """
+        key = (cls, proxy, bool(follow_redirects), timeout, retries)
+        with _scrapers_lock:
+            scraper = _SCRAPERS.get(key)
+            if scraper is not None:
+                _SCRAPERS.move_to_end(key)
+                return scraper
+            scraper = _SCRAPERS[key] = cls(proxy=proxy, follow_redirects=follow_redirects, timeout=timeout, retries=retries)
+            while len(_SCRAPERS) > _SCRAPERS_SIZE:
+                _SCRAPERS.popitem(last=False)
+        return scraper
+
     def __init__(self, proxy: Optional[str] = None, follow_redirects: bool = True, timeout: Optional[Union[int, float]] = None, retries: Optional[int] = 3 ):
         self.proxy = proxy
         self.timeout = timeout
         self.follow_redirects = bool(follow_redirects)
         self.retries = retries
+        # One client per scraper so keep-alive connections and TLS sessions are reused across `get` calls.
+        # `limits`/`http2` go to both: httpx only applies the client's own to the transport it builds for `proxy`.
+        limits = httpx.Limits(max_keepalive_connections=64, keepalive_expiry=30)
+        self._client = httpx.Client(
+            proxy=self.proxy,
+            transport=with_dns_cache(httpx.HTTPTransport(retries=self.retries, http2=_HTTP2, limits=limits)),
+            http2=_HTTP2,
+            limits=limits,
+            cookies=CookieJar(policy=_NoStoreCookiePolicy()))
 
-    def get(self, url: str, cookies: Optional[Dict] = None, timeout: Optional[Union[int, float]] = None, **kwargs: Dict) -> Response:
-        """Make basic HTTP GET request for you but with some added flavors.
+    def close(self) -> None:
+        """Close the underlying connection pool."""
+        self._client.close()
 
-        :param kwargs: Any keyword arguments are passed directly to `httpx.get()` function so check httpx documentation for details.
-        :return: A `Response` object that is the same as `Adaptor` object except it has these added attributes: `status`, `reason`, `cookies`, `headers`, and `request_headers`
+    def __del__(self):
+        client = getattr(self, '_client', None)
+        if client is not None:
+            client.close()
+
+    def async_client(self) -> httpx.AsyncClient:
+        """Create a pooled async client; use it as `async with` inside the running event loop so it binds to it."""
+        limits = httpx.Limits(max_connections=200, max_keepalive_connections=100)
+        return httpx.AsyncClient(
+            proxy=self.proxy,
+            transport=with_dns_cache(httpx.AsyncHTTPTransport(retries=self.retries, http2=_HTTP2, limits=limits)),
+            http2=_HTTP2,
+            limits=limits,
+            cookies=CookieJar(policy=_NoStoreCookiePolicy()))
+
+    async def aget(self, url: str, cookies: Optional[Dict] = None, timeout: Optional[Union[int, float]] = None, client: Optional[httpx.AsyncClient] = None, use_cache: bool = True, **kwargs: Dict) -> Response:
+        """Async version of `get`.
+
+        :param client: An `httpx.AsyncClient` from `async_client()` to share its connection pool between requests, a temporary one is used if not passed.
+        :param use_cache: Same as `get`.
+        :return: A `Response` object, same as `get`.
         """
-        headers = headers_job(kwargs.pop('headers', {}), url)
-        with httpx.Client(proxy=self.proxy, transport=httpx.HTTPTransport(retries=self.retries), cookies=cookies) as client:
-            request = client.get(url=url, headers=headers, follow_redirects=self.follow_redirects, timeout=self.timeout or timeout, **kwargs)
+        headers = kwargs.pop('headers', {})
+        key = _http_cache_key(url, cookies, headers, kwargs, use_cache)
+        # diskcache does blocking file I/O, keep it off the event loop
+        request = await asyncio.to_thread(_get_cached_response, url, key) if key else None
+        if request is None:
+            auth = kwargs.pop('auth', httpx.USE_CLIENT_DEFAULT)
+            if client is None:
+                async with self.async_client() as client:
+                    request = client.build_request('GET', url, headers=headers_job(headers, url), timeout=self.timeout or timeout, **kwargs)
+                    request = await _asend(client, request, cookies, self.follow_redirects, auth)
+            else:
+                request = client.build_request('GET', url, headers=headers_job(headers, url), timeout=self.timeout or timeout, **kwargs)
+                request = await _asend(client, request, cookies, self.follow_redirects, auth)
+            if key:
+                await asyncio.to_thread(_set_cached_response, key, request)
 
         # request.markdown = self.convert_to_markdown(request.content)
         # request.plain_text = self.convert_to_plain_text(request.markdown)
         response = Response(
             response=request, 
-            convert_to_markdown=convert_to_markdown, 
-            convert_to_plain_text=convert_to_plain_text)
+            convert_to_markdown=partial(convert_to_markdown, encoding=request.charset_encoding), 
+            convert_to_plain_text=partial(convert_to_plain_text, encoding=request.charset_encoding))
+        return response
+
+    def get(self, url: str, cookies: Optional[Dict] = None, timeout: Optional[Union[int, float]] = None, use_cache: bool = True, **kwargs: Dict) -> Response:
+        """Make basic HTTP GET request for you but with some added flavors.
+
+        :param use_cache: Set to False to always hit the network, e.g. for search result pages which may be captchas.
+        :param kwargs: Any keyword arguments are passed directly to httpx (`params`, `auth`, `extensions`...) so check httpx documentation for details.
+        :return: A `Response` object that is the same as `Adaptor` object except it has these added attributes: `status`, `reason`, `cookies`, `headers`, and `request_headers`
+
+        Plain GET requests (no `cookies`, custom `headers` or other `kwargs`) are served from an on-disk cache for
+        `WEBACCESS_HTTP_TTL` seconds (default 600).
+        """
+        headers = kwargs.pop('headers', {})
+        key = _http_cache_key(url, cookies, headers, kwargs, use_cache)
+        request = _get_cached_response(url, key) if key else None
+        if request is None:
+            auth = kwargs.pop('auth', httpx.USE_CLIENT_DEFAULT)
+            request = self._client.build_request('GET', url, headers=headers_job(headers, url), timeout=self.timeout or timeout, **kwargs)
+            request = _send(self._client, request, cookies, self.follow_redirects, auth)
+            if key:
+                _set_cached_response(key, request)
+
+        response = Response(
+            response=request, 
+            convert_to_markdown=partial(convert_to_markdown, encoding=request.charset_encoding), 
+            convert_to_plain_text=partial(convert_to_plain_text, encoding=request.charset_encoding))
         return response
       
-fetch = BasicScraper()
+fetch = BasicScraper.shared()
 
 if __name__ == '__main__':
-    
+    install_event_loop()
+
     print("Testing Simple Web page and markdown output:")
     response = fetch.get('https://huggingface.co/spaces')
     print(response.markdown)
@@ -1,11 +1,98 @@
 from search_engine import SearchEngine
-from scraper import fetch
+from scraper import fetch, install_event_loop, run_sync, convert_to_markdown, convert_to_plain_text, _sniff_ext
 from typing import List, Literal, Optional, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
 import json
+import multiprocessing
+import os
 import re
+import threading
 from functools import lru_cache
 
+_WS_RE = re.compile(r'\s+')
+
+# PDF and Office conversion (pdfminer, MarkItDown...) is CPU-bound and holds the GIL for long, so it runs in its own
+# processes sized to the cores. HTML is cheap enough that pickling it to a worker costs more than it saves and would
+# bypass this process's conversion cache, so it stays in a thread.
+_POOL_EXTS = ('.pdf', '.docx', '.xlsx', '.pptx')
+#
+# The workers are spawned rather than forked, forking while the fetching threads hold locks can deadlock them. Spawned
+# workers re-import the main module, so scripts converting PDF/Office files should keep their code under an
+# `if __name__ == '__main__':` guard. If the pool can't start or breaks, conversion falls back to this process.
+_PARSE_POOL: Optional[ProcessPoolExecutor] = None
+_parse_pool_disabled = False
+_parse_pool_lock = threading.Lock()
+
+def _get_parse_pool() -> Optional[ProcessPoolExecutor]:
+    """Start the conversion worker processes on first use, `None` if they can't be used."""
+    global _PARSE_POOL
+    with _parse_pool_lock:
+        # A process that is itself a multiprocessing child (e.g. an unguarded script re-imported by a worker) can't
+        # start its own pool while bootstrapping.
+        if _PARSE_POOL is None and not _parse_pool_disabled and multiprocessing.parent_process() is None:
+            _PARSE_POOL = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+    return _PARSE_POOL
+
+def _disable_parse_pool() -> None:
+    """Stop using the pool once it broke, a broken pool fails every later task and respawning would fail the same way."""
+    global _PARSE_POOL, _parse_pool_disabled
+    with _parse_pool_lock:
+        pool, _PARSE_POOL, _parse_pool_disabled = _PARSE_POOL, None, True
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def _submit_parse(*args) -> Optional[Future]:
+    """Send `_parse_to_text(*args)` to the pool, `None` if the pool can't take it."""
+    pool = _get_parse_pool()
+    if pool is None:
+        return None
+    try:
+        return pool.submit(_parse_to_text, *args)
+    except (BrokenProcessPool, RuntimeError):  # Broken, or shut down at interpreter exit
+        _disable_parse_pool()
+        return None
+
+def _parse_in_pool(*args) -> str:
+    """Run `_parse_to_text(*args)` in the pool, or in this process if the pool isn't usable."""
+    future = _submit_parse(*args)
+    if future is not None:
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            _disable_parse_pool()
+    return _parse_to_text(*args)
+
+async def _aparse_in_pool(*args) -> str:
+    """Async version of `_parse_in_pool`, the in-process fallback runs in a thread."""
+    future = _submit_parse(*args)
+    if future is not None:
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            _disable_parse_pool()
+    return await asyncio.to_thread(_parse_to_text, *args)
+
+def _parse_to_text(content: bytes, type: Literal['markdown', 'plain_text', 'clean'], max_text: Optional[int] = None, encoding: Optional[str] = None) -> str:
+    """Converts fetched content to the requested format, top-level so it can run in the parse pool."""
+    max_text = max_text if max_text and isinstance(max_text, int) and max_text > 0 else None
+    # Long HTML is only converted up to what max_text keeps
+    try:
+        if type == 'markdown':
+            content = convert_to_markdown(content, max_bytes=max_text, encoding=encoding)
+        else:
+            content = convert_to_plain_text(content, max_bytes=max_text, encoding=encoding)
+    except Exception as e:
+        # MarkItDown's exceptions hold a traceback, which can't be pickled back from the parse pool and would replace
+        # the actual message (e.g. a missing `markitdown[pdf]`) with a pickling error.
+        raise RuntimeError(str(e)) from e
+    if type == "clean":
+        content = _WS_RE.sub(' ', content)
+    if max_text:
+        content = content[:max_text]  # Truncate content if max_text is specified
+    return content
+
 class SearchWithExtractor(SearchEngine):
     """
     Extends the SearchEngine class to provide content extraction from search results.
@@ -39,12 +126,29 @@ class SearchWithExtractor(SearchEngine):
                 print(f"Failed to retrieve content object from: {url}")
                 return None
 
-            content = content_obj.markdown if type == 'markdown' else content_obj.plain_text
-            if type == "clean":
-                content = re.sub(r'\n+', ' ', content)
-                content = re.sub(r'\s+', ' ', content)
-            if max_text and isinstance(max_text, int) and max_text > 0:
-                content = content[:max_text]  # Truncate content if max_text is specified
+            args = (content_obj.content, type, max_text, content_obj.charset_encoding)
+            if _sniff_ext(content_obj.content) in _POOL_EXTS:
+                content = _parse_in_pool(*args)
+            else:
+                content = _parse_to_text(*args)
+            return {url: content}
+        except Exception as e:
+            print(f"Error fetching or processing {url}: {e}")  # More specific error logging
+            return None
+
+    async def _afetch(self, url: str, type: Literal['markdown', 'plain_text', 'clean'], max_text: Optional[int] = None, client=None) -> Optional[dict]:
+        """Async version of `fetch_site_from_url`, the conversion runs off the event loop to keep it free."""
+        try:
+            content_obj = await self.fetch.aget(url, client=client)
+            if content_obj is None:  # Handle potential None return
+                print(f"Failed to retrieve content object from: {url}")
+                return None
+
+            args = (content_obj.content, type, max_text, content_obj.charset_encoding)
+            if _sniff_ext(content_obj.content) in _POOL_EXTS:
+                content = await _aparse_in_pool(*args)
+            else:
+                content = await asyncio.to_thread(_parse_to_text, *args)
             return {url: content}
         except Exception as e:
             print(f"Error fetching or processing {url}: {e}")  # More specific error logging
@@ -54,6 +158,9 @@ class SearchWithExtractor(SearchEngine):
         """
         Fetches and extracts content from multiple URLs, sorting by content length.
 
+        Safe to call from inside a running event loop (it then runs in a worker thread), but async callers should
+        await `afetch_site_from_url_bulk` instead.
+
         Args:
             urls: A list of URLs to fetch.
             type: The desired content format ('markdown' or 'plain_text').
@@ -63,16 +170,25 @@ class SearchWithExtractor(SearchEngine):
             A list of dictionaries, each containing a URL and its extracted content,
             sorted in descending order of content length.
         """
-        results = []
-        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
-            futures = [executor.submit(self.fetch_site_from_url, url, type, max_text) for url in urls]
-            for future in as_completed(futures):
-                result = future.result()  # Get the result directly
-                if result:
-                    results.append(result)
+        return run_sync(lambda: self.afetch_site_from_url_bulk(urls, type, max_text))
+
+    async def afetch_site_from_url_bulk(self, urls: List[str], type: Literal['markdown', 'plain_text', 'clean'] = 'markdown', max_text: Optional[int] = None) -> List[dict]:
+        """Async version of `fetch_site_from_url_bulk`."""
+        # Bounded like a worker pool would be, so 1000 URLs don't mean 1000 sockets and pages in memory at once.
+        semaphore = asyncio.Semaphore(min(64, len(urls)) or 1)
+
+        async def _bounded_fetch(url: str, client) -> Optional[dict]:
+            async with semaphore:
+                return await self._afetch(url, type, max_text, client)
+
+        # One client per run so every request shares a single connection pool bound to this event loop.
+        async with self.fetch.async_client() as client:
+            gathered = await asyncio.gather(*(_bounded_fetch(url, client) for url in urls), return_exceptions=True)
+
+        results = [result for result in gathered if result and not isinstance(result, BaseException)]
 
         # Sort by content length (descending) using a stable sort.
-        return sorted(results, key=lambda item: len(item[list(item.keys())[0]]) if item else 0, reverse=True)
+        return sorted(results, key=lambda item: len(next(iter(item.values()))), reverse=True)
 
     # @lru_cache(None, typed=True)
     def auto_search_and_extract(self, queries: List[str], num_results_from_each: int = 3, combined: bool = True) -> List[dict]:
@@ -88,13 +204,14 @@ class SearchWithExtractor(SearchEngine):
             A list of dictionaries, each containing the url and its corresponding extracted content.
         """
         search_results = self.bulk_search(queries, num_results_from_each, combined)
-        extract_results = self.fetch_site_from_url_bulk(search_results, 'clean', max_text=4096)
-        sorted_results = sorted(extract_results, key=lambda item: len(item[list(item.keys())[0]]) if item else 0, reverse=True)
-        return sorted_results
+        # Already sorted by content length
+        return self.fetch_site_from_url_bulk(search_results, 'clean', max_text=4096)
 
 if __name__ == '__main__':
     import time
 
+    install_event_loop()
+
     queries = ['BTC latest price', 'ChatGPT vs Deepseek', 'Did coca cola get banned', 'Tips to stay safe online']
     providers_to_test = ['google', 'bing', 'yahoo', 'duckduckgo', 'auto']
     num_results_from_each = 3
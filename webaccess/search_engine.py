@@ -1,26 +1,55 @@
 from functools import cached_property, lru_cache
-from typing import Literal, List, Dict
-from scraper import fetch
-from lxml.etree import _Element
+from typing import Literal, List, Dict, Optional
+from scraper import fetch, prewarm, run_sync
+from lxml.etree import XPath
 from lxml.html import HTMLParser, document_fromstring
-from urllib.parse import unquote
+from urllib.parse import unquote, urlsplit
 import random
+import asyncio
+import re
+import os
+import tempfile
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from cachetools import TTLCache
 
-@lru_cache(None, typed=True)
+# Target URL wrapped in duckduckgo (`uddg=...&rut=`) and yahoo (`/RU=.../RK=2/RS=`) redirect links
+_REDIRECT_RE = re.compile(r'(?:uddg=|/RU=)(http.+?)(?:&rut=|/RK=2/RS=|$)')
+
+@lru_cache(maxsize=100_000, typed=True)
 def _normalize_url(url: str) -> str:
     """Unquote URL and replace spaces with '+' along with some URL cleanup."""
-    # for duckduckgo
-    if "uddg=http" in url:
-        url = url.split("uddg=", 1)[1]
-        if "&rut=" in url:
-            url = url.split("&rut=", 1)[0]
-    # for yahoo
-    if "/RU=http" in url:
-        url = url.split("/RU=", 1)[1]
-        if "/RK=2/RS" in url:
-            url = url.split("/RK=2/RS=", 1)[0]
-    return unquote(url.replace(" ", "+")) if url else ""
+    match = _REDIRECT_RE.search(url)
+    if match:
+        url = match.group(1)
+    url = url.replace(" ", "+")
+    # Most result links have no escapes, skip unquote's parsing for them
+    return unquote(url) if "%" in url else url
+
+# Search results keyed on (provider, query, num_results), tunable with the `WEBACCESS_SERP_TTL` (seconds) and
+# `WEBACCESS_SERP_CACHE_SIZE` env variables.
+_SERP_CACHE = TTLCache(maxsize=int(os.environ.get('WEBACCESS_SERP_CACHE_SIZE', 1024)), ttl=float(os.environ.get('WEBACCESS_SERP_TTL', 300)))
+_SERP_LOCK = threading.Lock()  # TTLCache isn't thread-safe
+
+def _get_cached_serp(key: tuple) -> Optional[List[str]]:
+    with _SERP_LOCK:
+        results = _SERP_CACHE.get(key)
+    return list(results) if results is not None else None
+
+def _set_cached_serp(key: tuple, results: List[str]) -> None:
+    # Empty pages are usually a captcha or a block, don't keep them around.
+    if results:
+        with _SERP_LOCK:
+            _SERP_CACHE[key] = tuple(results)
+
+def _collect_urls(hrefs: List[str]) -> List[str]:
+    """Normalize result links and keep the unique http(s) ones, in page order."""
+    seen = {}
+    for href in hrefs:
+        href = _normalize_url(href)
+        if href.startswith("http"):
+            seen.setdefault(href, None)
+    return list(seen)
 
 class SearchEngine:
     def __init__(self, provider: Literal['google', 'bing', 'yahoo', 'duckduckgo', 'auto'] = 'google') -> None:
@@ -32,90 +61,63 @@ class SearchEngine:
         """Get an HTML parser configured for scraping."""
         return HTMLParser(remove_blank_text=True, remove_comments=True, remove_pis=True, collect_ids=False)
 
+    # Search page of each provider
+    _search_urls = {
+        'google': 'https://www.google.com/search?udm=14&q={query}&num={num_results}',
+        'bing': 'https://www.bing.com/search?q={query}&count={num_results}',
+        'yahoo': 'https://search.yahoo.com/search?q={query}&n={num_results}',
+        'duckduckgo': 'https://www.duckduckgo.com/html/?q={query}&num={num_results}',
+    }
+    # Result links of each provider, compiled once and returning plain strings (no back-references to the tree).
+    _google_xpath = XPath("//div/span/a/@href", smart_strings=False)
+    _bing_xpath = XPath("//h2/a/@href", smart_strings=False)
+    _yahoo_xpath = XPath("//div[@class='d-ib v-v']/a/@href", smart_strings=False)
+    _duckduckgo_xpath = XPath("//div[h2]/a/@href", smart_strings=False)
+
+    def _parse_results(self, provider: str, content: bytes) -> List[str]:
+        """Extract the result links from a provider's search page."""
+        if os.environ.get('WEBACCESS_DEBUG_DUMP'):
+            # Unique file per page so concurrent searches don't overwrite each other
+            with tempfile.NamedTemporaryFile(suffix=f'_{provider}.html', delete=False) as f:
+                f.write(content)
+        tree = document_fromstring(content, parser=self.parser)
+        return _collect_urls(getattr(self, f'_{provider}_xpath')(tree))
+
     def _search_google(self, query: str, num_results: int) -> List[str]:
-        page_results = []
-        cache = set()
-        search_results = self.fetch.get(f'https://www.google.com/search?udm=14&q={query}&num={num_results}')
-        tree = document_fromstring(search_results.content, parser=self.parser)
-        elements = tree.xpath("//div")
-        if not isinstance(elements, list):
-            return []
-        for e in elements:
-            if isinstance(e, _Element):
-                hrefxpath = e.xpath("./span/a/@href")
-                href = str(hrefxpath[0]) if hrefxpath and isinstance(hrefxpath, list) else None
-                href = _normalize_url(href) if href else None
-                if href and href not in cache and href.startswith("http"):
-                    cache.add(href)
-                    page_results.append(href)
-                    # print(f"{e.tag} {e.attrib} {href}")
-        return page_results
+        search_results = self.fetch.get(self._search_urls['google'].format(query=query, num_results=num_results), use_cache=False)
+        return self._parse_results('google', search_results.content)
 
     def _search_bing(self, query: str, num_results: int) -> List[str]:
-        page_results = []
-        cache = set()
-        search_results = self.fetch.get(f'https://www.bing.com/search?q={query}&count={num_results}')
-        # print(search_results.content)
-        with open('bing.html', 'wb') as f:
-            f.write(search_results.content)
-        tree = document_fromstring(search_results.content, parser=self.parser)
-        elements = tree.xpath("//h2")
-        if not isinstance(elements, list):
-            return []
-        for e in elements:
-            if isinstance(e, _Element):
-                hrefxpath = e.xpath("./a/@href")
-                # if hrefxpath and isinstance(hrefxpath, list):
-                #     print(hrefxpath)
-                #     print(f"{e.tag} {e.attrib}")
-                href = str(hrefxpath[0]) if hrefxpath and isinstance(hrefxpath, list) else None
-                href = _normalize_url(href) if href else None
-                if ( href and href.startswith("http") and href not in cache ):
-                    cache.add(href)
-                    page_results.append(href)
-                    # print(f"{e.tag} {e.attrib} {href}")
-        return page_results
+        search_results = self.fetch.get(self._search_urls['bing'].format(query=query, num_results=num_results), use_cache=False)
+        return self._parse_results('bing', search_results.content)
 
     def _search_yahoo(self, query: str, num_results: int) -> List[str]:
-        page_results = []
-        cache = set()
-        search_results = self.fetch.get(f'https://search.yahoo.com/search?q={query}&n={num_results}')
-        tree = document_fromstring(search_results.content, parser=self.parser)
-        elements = tree.xpath("//div")
-        if not isinstance(elements, list):
-            return []
-        for e in elements:
-            if isinstance(e, _Element):
-                hrefxpath = e.xpath("./a/@href")
-                href = str(hrefxpath[0]) if hrefxpath and isinstance(hrefxpath, list) else None
-                href = _normalize_url(href) if href else None
-                if href and e.attrib.get('class') == 'd-ib v-v' and href not in cache:
-                    cache.add(href)
-                    page_results.append(href)
-                    # print(f"{e.tag} {e.attrib} {href}")
-        return page_results
+        search_results = self.fetch.get(self._search_urls['yahoo'].format(query=query, num_results=num_results), use_cache=False)
+        return self._parse_results('yahoo', search_results.content)
 
     def _search_duckduckgo(self, query: str, num_results: int) -> List[str]:
-        page_results = []
-        cache = set()
-        html = self.fetch.get(f'https://www.duckduckgo.com/html/?q={query}&num={num_results}')
-        tree = document_fromstring(html.content, parser=self.parser)
-        elements = tree.xpath("//div[h2]")
-        if not isinstance(elements, list):
-            return []
-        for e in elements:
-            if isinstance(e, _Element):
-                hrefxpath = e.xpath("./a/@href")
-                href = str(hrefxpath[0]) if hrefxpath and isinstance(hrefxpath, list) else None
-                href = _normalize_url(href) if href else None
-                if href and href not in cache:
-                    cache.add(href)
-                    page_results.append(href)
-                    # print(f"{e.tag} {e.attrib} {href}")
-        return page_results
+        html = self.fetch.get(self._search_urls['duckduckgo'].format(query=query, num_results=num_results), use_cache=False)
+        return self._parse_results('duckduckgo', html.content)
+
+    async def _asearch_provider(self, provider: str, query: str, num_results: int, client=None) -> List[str]:
+        """Async version of the `_search_*` methods, `client` is an `httpx.AsyncClient` shared between requests.
+
+        Like them it skips the HTTP disk cache, a captcha page would be replayed for its whole TTL, only parsed results
+        that aren't empty are cached (in `_SERP_CACHE`).
+        """
+        search_results = await self.fetch.aget(self._search_urls[provider].format(query=query, num_results=num_results), client=client, use_cache=False)
+        return self._parse_results(provider, search_results.content)[:num_results]
 
     def search(self, query: str, num_results: int = 5) -> List[str]:
-        """Dispatch search based on the selected provider."""
+        """Dispatch search based on the selected provider, results are cached for a few minutes."""
+        key = (self.provider, query, num_results)
+        results = _get_cached_serp(key)
+        if results is None:
+            results = self._search_uncached(query, num_results)
+            _set_cached_serp(key, results)
+        return results
+
+    def _search_uncached(self, query: str, num_results: int) -> List[str]:
         if self.provider == 'google':
             return self._search_google(query, num_results)[:num_results]
         elif self.provider == 'bing':
@@ -145,6 +147,30 @@ class SearchEngine:
         else:
             return []
 
+    async def _asearch(self, query: str, num_results: int = 5, client=None) -> List[str]:
+        """Async version of `search`, provider requests share `client` and run concurrently in `auto` mode."""
+        key = (self.provider, query, num_results)
+        results = _get_cached_serp(key)
+        if results is None:
+            results = await self._asearch_uncached(query, num_results, client)
+            _set_cached_serp(key, results)
+        return results
+
+    async def _asearch_uncached(self, query: str, num_results: int, client=None) -> List[str]:
+        if self.provider == 'auto':
+            chosen = random.sample(list(self._search_urls), 2)
+            # Through each provider's own `_asearch` so its results are cached the same way as in the sync `search`
+            engines = [SearchEngine(provider=eng) for eng in chosen]
+            batches = await asyncio.gather(*(engine._asearch(query, num_results, client) for engine in engines), return_exceptions=True)
+            results = [url for batch in batches if not isinstance(batch, BaseException) for url in batch]
+            # Deduplicate while preserving order
+            deduped = list(dict.fromkeys(results))
+            return deduped[:num_results]
+        elif self.provider in self._search_urls:
+            return await self._asearch_provider(self.provider, query, num_results, client)
+        else:
+            return []
+
     def _search_with_error_handling(self, query: str, num_results_from_each: int) -> Dict:
         try:
             result_urls = self.search(query, num_results_from_each)
@@ -154,6 +180,14 @@ class SearchEngine:
             print(f"Search error for query '{query}': {e}")
             return {'query': query, 'urls': [], 'error': str(e)}
 
+    async def _asearch_with_error_handling(self, query: str, num_results_from_each: int, client=None) -> Dict:
+        try:
+            result_urls = await self._asearch(query, num_results_from_each, client)
+            return {'query': query, 'urls': result_urls}
+        except Exception as e:
+            print(f"Search error for query '{query}': {e}")
+            return {'query': query, 'urls': [], 'error': str(e)}
+
     def bulk_search(self, queries: List[str], num_results_from_each: int = 3, combined: bool = True) -> List[Dict]:
         """
         Performs a bulk search across multiple queries in the same order as the input list.
@@ -164,21 +198,32 @@ class SearchEngine:
 
         Returns:
             A list of dictionaries, each containing the query and its corresponding URLs.
+
+        Safe to call from inside a running event loop (it then runs in a worker thread), but async callers should
+        await `abulk_search` instead.
         """
-        max_workers = min(10, len(queries)) if queries else 1  # Adjust max_workers as needed.
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # executor.map preserves the order of input queries.
-            results = list(executor.map(lambda q: self._search_with_error_handling(q, num_results_from_each), queries))
-            if combined:
-                urls = []
-                for json_obj in results:
-                    url = json_obj['urls']
-                    if not url:
-                        continue
-                    urls.extend(url)
-                return urls
+        return run_sync(lambda: self.abulk_search(queries, num_results_from_each, combined))
+
+    async def abulk_search(self, queries: List[str], num_results_from_each: int = 3, combined: bool = True) -> List[Dict]:
+        """Async version of `bulk_search`."""
+        # All queries (and both engines in `auto` mode) share one connection pool bound to this event loop.
+        async with self.fetch.async_client() as client:
+            # gather preserves the order of input queries.
+            results = await asyncio.gather(*(self._asearch_with_error_handling(q, num_results_from_each, client) for q in queries))
+
+        if combined:
+            urls = []
+            for json_obj in results:
+                url = json_obj['urls']
+                if not url:
+                    continue
+                urls.extend(url)
+            return urls
         return results
 
+# The search engines are hit on every search, look them up while the caller builds its queries.
+prewarm([urlsplit(url).hostname for url in SearchEngine._search_urls.values()])
+
 if __name__ == '__main__':
     import time
 